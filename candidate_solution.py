@@ -1,14 +1,69 @@
 # candidate_solution.py
+import asyncio
 import httpx
 from pydoc import text
 import sqlite3
 import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache, wraps
 from fastapi import FastAPI, HTTPException
 from typing import List, Optional
 import uvicorn
 
 # --- Constants ---
 DB_NAME = "pokemon_assessment.db"
+READ_POOL_SIZE = 4
+STATEMENT_CACHE_SIZE = 256
+ID_CACHE_SIZE = 512
+RESPONSE_CACHE_SIZE = 1024
+RESPONSE_CACHE_TTL = 300  # seconds
+POKEAPI_TIMEOUT = 10.0  # seconds
+POKEAPI_KEEPALIVE_CONNECTIONS = 20
+POKEAPI_CACHE_SIZE = 1024
+POKEAPI_CACHE_TTL = 24 * 60 * 60  # seconds; PokeAPI data rarely changes
+
+# Lookup indexes for the API queries; NOCASE name indexes serve `name = ? COLLATE NOCASE`
+INDEXES = {
+    "idx_pokemon_name": "pokemon(name COLLATE NOCASE)",
+    "idx_types_name": "types(name COLLATE NOCASE)",
+    "idx_abilities_name": "abilities(name COLLATE NOCASE)",
+    "idx_trainers_name": "trainers(name COLLATE NOCASE)",
+    "idx_pokemon_type1_id": "pokemon(type1_id)",
+    "idx_pokemon_type2_id": "pokemon(type2_id)",
+    "idx_pa_ability_id": "pokemon_abilities(ability_id)",
+    "idx_pa_pokemon_id": "pokemon_abilities(pokemon_id)",
+    "idx_tp_pokemon_id": "trainer_pokemon(pokemon_id)",
+    "idx_tpa_ability_id": "trainer_pokemon_abilities(ability_id)",
+}
+
+# Known corrections for names, types, abilities, trainers
+MISSPELLINGS = {
+    "Pikuchu": "Pikachu",
+    "gras": "Grass",
+    "fir": "Fire",
+    "eletric": "Electric",
+    "Charmanderr": "Charmander",
+    "Gary oak": "Gary Oak",
+    "Ash ketchum": "Ash Ketchum",
+    "Professor oak": "Professor Oak",
+    "Poision": "Poison",
+}
+CLEAN_TABLES = ['pokemon', 'types', 'abilities', 'trainers']
+DIRTY_NAMES = ('Remove this ability', '---', '', '???')
+
+# Matches names with any character outside printable ASCII. SQLite's UPPER/LOWER only
+# fold ASCII letters, so clean_database capitalizes these rows in Python instead.
+NON_ASCII_GLOB = "*[^ -~]*"
+
+# SQL fragments and parameters for clean_database, built once at import
+DIRTY_PLACEHOLDERS = ", ".join("?" for _ in DIRTY_NAMES)
+CORRECTIONS_SQL = ", ".join("(?, ?)" for _ in MISSPELLINGS)
+CORRECTIONS_PARAMS = tuple(value for pair in MISSPELLINGS.items() for value in pair)
 
 
 # --- Database Connection ---
@@ -25,7 +80,14 @@ def connect_db() -> Optional[sqlite3.Connection]:
     connection = None
     try:
         # --- Implement Here ---
-        connection = sqlite3.connect(DB_NAME)
+        # The API shares connections across FastAPI's worker threads.
+        # Autocommit mode (isolation_level=None): writers open transactions with explicit BEGIN.
+        connection = sqlite3.connect(
+            DB_NAME,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            isolation_level=None,
+            check_same_thread=False,
+        )
         connection.row_factory = sqlite3.Row
         return connection
         # --- End Implementation ---
@@ -36,7 +98,157 @@ def connect_db() -> Optional[sqlite3.Connection]:
     return connection
 
 
+def tune_connection(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """
+    Apply the WAL and cache pragmas used by the API's long-lived connections.
+    """
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    return conn
+
+
+def create_indexes(conn: sqlite3.Connection):
+    """
+    Create the lookup indexes used by the API if they do not exist yet.
+    """
+    for index_name, target in INDEXES.items():
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {target}")
+
+
+def refresh_pokemon_trainer_flat(conn: sqlite3.Connection):
+    """
+    Rebuild pokemon_trainer_flat, a denormalised copy of the Pokemon-to-trainer join
+    that lets get_trainers_by_pokemon answer with a single index lookup.
+    """
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("""CREATE TABLE IF NOT EXISTS pokemon_trainer_flat (
+            pokemon_name TEXT COLLATE NOCASE,
+            trainer_name TEXT)""")
+        conn.execute("""CREATE INDEX IF NOT EXISTS idx_ptf_pokemon_name
+            ON pokemon_trainer_flat(pokemon_name, trainer_name)""")
+        conn.execute("DELETE FROM pokemon_trainer_flat")
+        conn.execute("""INSERT INTO pokemon_trainer_flat (pokemon_name, trainer_name)
+            SELECT pokemon.name, trainers.name FROM trainer_pokemon
+            JOIN pokemon ON pokemon.id = trainer_pokemon.pokemon_id
+            JOIN trainers ON trainers.id = trainer_pokemon.trainer_id""")
+        conn.execute("COMMIT")
+    except sqlite3.Error:
+        conn.execute("ROLLBACK")
+        raise
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of read-only connections shared by the GET endpoints.
+    Under WAL, readers do not block each other or the single writer connection.
+    """
+
+    def __init__(self, size: int = READ_POOL_SIZE):
+        self._connections = queue.Queue(maxsize=size)
+        try:
+            for _ in range(size):
+                conn = connect_db()
+                if not conn:
+                    raise RuntimeError("Database connection failed")
+                self._connections.put(conn)
+                tune_connection(conn).execute("PRAGMA query_only=1")
+        except Exception:
+            # Close the connections opened so far before giving up
+            self.close()
+            raise
+
+    @contextmanager
+    def get_conn(self):
+        """Borrow a connection, returning it to the pool when the block exits."""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+# --- Caching ---
+class ResponseCache:
+    """
+    Thread-safe LRU cache whose entries expire `ttl` seconds after being stored.
+    `generation` increases on every clear(), so values computed before a clear can be rejected.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for `key`, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation: Optional[int] = None):
+        """Store `value`, unless `generation` is given and the cache has been cleared since."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+
 # --- Data Cleaning ---
+def build_clean_statements(table: str) -> dict:
+    """
+    Build the SQL used by clean_database for one table.
+    `table` must come from CLEAN_TABLES, since it is formatted into the statements.
+    """
+    return {
+        "delete_dirty": f"DELETE FROM {table} WHERE name IN ({DIRTY_PLACEHOLDERS})",
+        # Only printable-ASCII names reach this statement, so spaces are the only whitespace to trim.
+        # Tabs, line breaks and Unicode spaces such as U+00A0 are stripped by the Python pass.
+        "clean_names": f"""WITH corrections(bad, good) AS (VALUES {CORRECTIONS_SQL}),
+            trimmed(id, name) AS (
+                SELECT id, TRIM(name) FROM {table}
+                WHERE name NOT GLOB '{NON_ASCII_GLOB}'),
+            corrected(id, name) AS (
+                SELECT t.id, COALESCE(c.good, t.name) FROM trimmed t
+                LEFT JOIN corrections c ON c.bad = t.name),
+            cleaned(id, name) AS (
+                SELECT id, UPPER(SUBSTR(name, 1, 1)) || LOWER(SUBSTR(name, 2)) FROM corrected)
+            UPDATE {table} SET name = cleaned.name
+            FROM cleaned WHERE cleaned.id = {table}.id AND {table}.name IS NOT cleaned.name""",
+        "select_non_ascii": f"SELECT id, name FROM {table} WHERE name GLOB '{NON_ASCII_GLOB}'",
+        "update_name": f"UPDATE {table} SET name = ? WHERE id = ?",
+        "dedup": f"""DELETE FROM {table} WHERE rowid NOT IN (
+            SELECT MIN(rowid) FROM {table} GROUP BY TRIM(name))""",
+    }
+
+
+# Statement text is identical on every run, so sqlite3's statement cache can reuse the compiled form
+CLEAN_STATEMENTS = {table: build_clean_statements(table) for table in CLEAN_TABLES}
+
+
 def clean_database(conn: sqlite3.Connection):
     """
     Task 2: Clean up the database using the provided connection object.
@@ -53,51 +265,57 @@ def clean_database(conn: sqlite3.Connection):
     cursor = conn.cursor()
     print("Starting database cleaning...")
     
+    # Run the whole clean-up as one write transaction so it is synced once.
+    # Pragmas and BEGIN are not allowed inside a transaction, so if the caller
+    # already has one open, clean inside a savepoint and leave the commit to the caller.
+    owns_transaction = not conn.in_transaction
+
     try:
     # --- Implement Here ---
-        # Known corrections for names,types,abilities, trainers
-        misspellings = {
-        "Pikuchu": "Pikachu",
-        "gras": "Grass",
-        "fir": "Fire",
-        "eletric": "Electric",
-        "Charmanderr": "Charmander",
-        "Gary oak": "Gary Oak",
-        "Ash ketchum": "Ash Ketchum",
-        "Professor oak": "Professor Oak",
-        "Poision": "Poison",
-        }
-
-        tables = ['pokemon', 'types', 'abilities', 'trainers']
-        dirty_data = {'Remove this ability', '---', '', '???'}
-
-        for table in tables:
+        if owns_transaction:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute("SAVEPOINT clean_database")
+
+        for table in CLEAN_TABLES:
+            statements = CLEAN_STATEMENTS[table]
+
             # Remove known dirty records
-            for dirty_value in dirty_data:
-                cursor.execute(f"DELETE FROM {table} WHERE name = ?", (dirty_value,))
+            cursor.execute(statements["delete_dirty"], DIRTY_NAMES)
 
             # Fix names => correct misspellings, capitalize the first letter
-            cursor.execute(f"SELECT id, name FROM {table}")
-            for row_id, name in cursor.fetchall():
-                original_name = name
-                cleaned_name = misspellings.get(name.strip(), name.strip())
-                cleaned_name = cleaned_name.capitalize()
-
-                # Only update if the name has changed
-                if cleaned_name != original_name:
-                    cursor.execute(f"UPDATE {table} SET name = ? WHERE id = ?", (cleaned_name, row_id))
+            cursor.execute(statements["clean_names"], CORRECTIONS_PARAMS)
+            # Names outside printable ASCII are left to str.strip()/capitalize(), which handle Unicode
+            # Stream the rows; the executemany below only runs once the loop has finished
+            cursor.execute(statements["select_non_ascii"])
+            updates = []
+            for row_id, name in cursor:
+                cleaned_name = MISSPELLINGS.get(name.strip(), name.strip()).capitalize()
+                if cleaned_name != name:
+                    updates.append((cleaned_name, row_id))
+            cursor.executemany(statements["update_name"], updates)
 
             # Remove duplicates by keep the row with the lowest rowid for each cleaned name
-            query = f"""DELETE FROM {table} WHERE rowid NOT IN (
-                    SELECT MIN(rowid) FROM {table} GROUP BY TRIM(name))"""
-            cursor.execute(query)
+            cursor.execute(statements["dedup"])
         # --- End Implementation ---
-        conn.commit()
-        print("Database cleaning finished and changes committed.")
+        if owns_transaction:
+            conn.execute("COMMIT")
+            print("Database cleaning finished and changes committed.")
+        else:
+            conn.execute("RELEASE clean_database")
+            print("Database cleaning finished inside the caller's transaction.")
 
     except sqlite3.Error as e:
         print(f"An error occurred during database cleaning: {e}")
-        conn.rollback()  # Roll back changes on error
+        # Roll back changes on error, but never discard work the caller did before the clean-up
+        if owns_transaction:
+            if conn.in_transaction:
+                conn.rollback()
+        else:
+            conn.execute("ROLLBACK TO clean_database")
+            conn.execute("RELEASE clean_database")
 
 # --- FastAPI Application ---
 def create_fastapi_app() -> FastAPI:
@@ -106,7 +324,73 @@ def create_fastapi_app() -> FastAPI:
     Define the FastAPI app and include all the required endpoints below.
     """
     print("Creating FastAPI app and defining endpoints...")
-    app = FastAPI(title="Pokemon Assessment API")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        # Keep long-lived connections so SQLite's page cache survives between requests:
+        # one writer for create_pokemon and a pool of readers for the GET endpoints
+        writer = connect_db()
+        if not writer:
+            raise RuntimeError("Database connection failed")
+        pool = None
+        http = None
+        # Set up inside the try so a failed startup (e.g. a locked database) still closes the connections
+        try:
+            app.state.writer = tune_connection(writer)
+            create_indexes(writer)
+            # create_pokemon never links trainers, so a rebuild at startup keeps the flat table current
+            refresh_pokemon_trainer_flat(writer)
+            app.state.pool = pool = ConnectionPool()
+            # Share one HTTP client so PokeAPI connections and TLS sessions are kept alive between requests
+            app.state.http = http = httpx.AsyncClient(
+                timeout=POKEAPI_TIMEOUT,
+                limits=httpx.Limits(max_keepalive_connections=POKEAPI_KEEPALIVE_CONNECTIONS),
+            )
+            yield
+        finally:
+            if http:
+                await http.aclose()
+            if pool:
+                pool.close()
+            writer.close()
+
+    app = FastAPI(title="Pokemon Assessment API", lifespan=lifespan)
+    app.state.response_cache = ResponseCache()
+    app.state.write_lock = threading.Lock()
+    app.state.pokeapi_cache = ResponseCache(maxsize=POKEAPI_CACHE_SIZE, ttl=POKEAPI_CACHE_TTL)
+
+    def cached_response(endpoint):
+        """
+        Serve repeat GET requests from the response cache, keyed by endpoint and lower-cased path parameter.
+        Only successful responses are stored; create_pokemon clears the cache after writing.
+        """
+        @wraps(endpoint)
+        def wrapper(**params):
+            key = (endpoint.__name__,) + tuple(str(value).lower() for value in params.values())
+            cache = app.state.response_cache
+            result = cache.get(key)
+            if result is None:
+                # Read the generation first: a create that commits while the endpoint runs
+                # clears the cache, and the possibly stale result is then not stored
+                generation = cache.generation
+                result = endpoint(**params)
+                cache.set(key, result, generation)
+            return result
+        return wrapper
+
+    @lru_cache(maxsize=ID_CACHE_SIZE)
+    def lookup_id(table: str, name: str) -> int:
+        """
+        Returns the ID of a committed record by its lower-cased name, caching hits in memory.
+        Raises KeyError when no record matches; lru_cache does not store exceptions,
+        so a name is looked up again once it has been created.
+        Borrows its own pooled connection, so call it before entering pool.get_conn().
+        """
+        with app.state.pool.get_conn() as conn:
+            result = conn.execute(f"SELECT id FROM {table} WHERE name = ? COLLATE NOCASE;", (name,)).fetchone()
+        if not result:
+            raise KeyError(name)
+        return result["id"]
 
     # --- Define Endpoints Here ---
     @app.get("/")
@@ -120,145 +404,134 @@ def create_fastapi_app() -> FastAPI:
         # --- End Implementation ---
 
     @app.get("/pokemon/ability/{ability_name}", response_model=List[str])
+    @cached_response
     def get_pokemon_by_ability(ability_name: str):
         """
         Task 4: Retrieve all Pokemon names with a specific ability.
         Query the cleaned database. Handle cases where the ability doesn't exist.
         """
         # --- Implement here ---
-        conn = connect_db()
-        cursor = conn.cursor()
-        
         try:
             #Check if ability is available
-            cursor.execute(
-                "SELECT id FROM abilities WHERE LOWER(name) = LOWER(?)",
-                (ability_name.strip().lower(),)
-            )
-            ability = cursor.fetchone()
-
-            if not ability:
+            try:
+                ability_id = lookup_id("abilities", ability_name.strip().lower())
+            except KeyError:
                 raise HTTPException(status_code=404, detail=f"Ability '{ability_name}' not found.")
 
-            # Retrieve Pokémon names with this ability
-            query = """SELECT DISTINCT p.name FROM pokemon p
-                JOIN trainer_pokemon_abilities tpa ON p.id = tpa.pokemon_id
-                JOIN abilities a ON tpa.ability_id = a.id
-                WHERE LOWER(a.name) = LOWER(?) ORDER BY p.name"""
-            cursor.execute(query, (ability_name.strip().lower(),))
-            results = cursor.fetchall()
+            with app.state.pool.get_conn() as conn:
+                cursor = conn.cursor()
+
+                # Retrieve Pokémon names with this ability
+                query = """SELECT DISTINCT p.name FROM trainer_pokemon_abilities tpa
+                    JOIN pokemon p ON p.id = tpa.pokemon_id
+                    WHERE tpa.ability_id = ? ORDER BY p.name"""
+                cursor.execute(query, (ability_id,))
+
+                pokemon_list = [row["name"] for row in cursor]
+                if not pokemon_list:
+                    raise HTTPException(status_code=404, detail="No Pokemon found with this ability")
+                return pokemon_list
 
-            return [row["name"] for row in results] if results else HTTPException(status_code=404, detail="No Pokemon found with this ability")
-        
         except sqlite3.Error as e:
             raise HTTPException(status_code=500, detail=f"Database error: {e}")
-        finally:
-            conn.close()
         # --- End Implementation ---
 
     @app.get("/pokemon/type/{type_name}", response_model=List[str])
+    @cached_response
     def get_pokemon_by_type(type_name: str):
         """
         Task 5: Retrieve all Pokémon names of a specific type (considers type1 and type2).
         Query the cleaned database. Handle cases where the type doesn't exist.
         """
         # --- Implement here ---
-        conn = connect_db()
-        cursor = conn.cursor()
-        
         try:
             # Check if type is available
-            cursor.execute("SELECT id FROM types WHERE name = ?", (type_name,))
-            type_result = cursor.fetchone()
-            
-            if not type_result:
+            try:
+                type_id = lookup_id("types", type_name.lower())
+            except KeyError:
                 raise HTTPException(status_code=404, detail="Type not found")
-            
-            # Get Pokemon with the type
-            # Using the LEFT JOIN is to ensure we get a Pokemon even if they have only one type
-            query = """SELECT DISTINCT p.name FROM pokemon p
-            LEFT JOIN types t1 ON p.type1_id = t1.id LEFT JOIN types t2 ON p.type2_id = t2.id
-            WHERE t1.name = ? OR t2.name = ?;"""
-            cursor.execute(query, (type_name, type_name))
-            
-            pokemon_list = [row['name'] for row in cursor.fetchall()]
-            if not pokemon_list:
-                raise HTTPException(status_code=404, detail="No Pokemon found with this type")
-            return pokemon_list
-        
+
+            with app.state.pool.get_conn() as conn:
+                cursor = conn.cursor()
+
+                # Get Pokemon with the type in either slot.
+                # One indexed seek per slot; UNION removes duplicates without a separate DISTINCT.
+                query = """SELECT name FROM pokemon WHERE type1_id = ?
+                UNION
+                SELECT name FROM pokemon WHERE type2_id = ?;"""
+                cursor.execute(query, (type_id, type_id))
+
+                pokemon_list = [row['name'] for row in cursor]
+                if not pokemon_list:
+                    raise HTTPException(status_code=404, detail="No Pokemon found with this type")
+                return pokemon_list
+
         except sqlite3.Error as e:
             raise HTTPException(status_code=500, detail=f"Database error: {e}")
-        finally:
-            conn.close()
         # --- End Implementation ---
 
     @app.get("/trainers/pokemon/{pokemon_name}", response_model=List[str])
+    @cached_response
     def get_trainers_by_pokemon(pokemon_name: str):
         """
         Task 6: Retrieve all trainer names who have a specific Pokémon.
         Query the cleaned database. Handle cases where the Pokémon doesn't exist or has no trainer.
         """
         # --- Implement here ---
-        conn = connect_db()
-        cursor = conn.cursor()
-        
         try:
-            # Check if Pokemon exists
-            cursor.execute("SELECT id FROM pokemon WHERE LOWER(name) = LOWER(?)", (pokemon_name.lower(),))
-            pokemon_result = cursor.fetchone()
-            
-            if not pokemon_result:
-                raise HTTPException(status_code=404, detail="Pokemon not found")
+            with app.state.pool.get_conn() as conn:
+                cursor = conn.cursor()
+
+                # Get trainers who have the Pokemon from the precomputed join
+                cursor.execute(
+                    "SELECT trainer_name FROM pokemon_trainer_flat WHERE pokemon_name = ?",
+                    (pokemon_name,)
+                )
+                trainers_list = [row['trainer_name'] for row in cursor]
 
-            # Get trainers who have the Pokemon
-            cursor.execute("""SELECT trainers.name FROM trainers 
-                JOIN trainer_pokemon ON trainers.id = trainer_pokemon.trainer_id 
-                JOIN pokemon ON trainer_pokemon.pokemon_id = pokemon.id 
-                WHERE LOWER(pokemon.name) = LOWER(?)""", (pokemon_name.lower(),))
-                
-            trainers_list = [row['name'] for row in cursor.fetchall()]
             if not trainers_list:
+                # Only an empty result needs the Pokemon lookup to pick the right 404
+                try:
+                    lookup_id("pokemon", pokemon_name.lower())
+                except KeyError:
+                    raise HTTPException(status_code=404, detail="Pokemon not found")
                 raise HTTPException(status_code=404, detail="No trainers found with this Pokemon")
             return trainers_list
-        
+
         except sqlite3.Error as e:
             raise HTTPException(status_code=500, detail=f"Database error: {e}")
-        finally:
-            conn.close()
         # --- End Implementation ---
 
     @app.get("/abilities/pokemon/{pokemon_name}", response_model=List[str])
+    @cached_response
     def get_abilities_by_pokemon(pokemon_name: str):
         """
         Task 7: Retrieve all ability names of a specific Pokémon.
         Query the cleaned database. Handle cases where the Pokémon doesn't exist.
         """
         # --- Implement here ---
-        conn = connect_db()
-        cursor = conn.cursor()
-        
         try:
             # Check if Pokemon exists
-            cursor.execute("SELECT id FROM pokemon WHERE LOWER(name) = LOWER(?)", (pokemon_name.lower(),))
-            pokemon_result = cursor.fetchone()
-            if not pokemon_result:
+            try:
+                pokemon_id = lookup_id("pokemon", pokemon_name.lower())
+            except KeyError:
                 raise HTTPException(status_code=404, detail="Pokemon not found")
 
-            # Get abilities of the Pokemon
-            query = """SELECT DISTINCT a.name FROM abilities a
-            JOIN pokemon_abilities pa ON a.id = pa.ability_id
-            JOIN pokemon p ON pa.pokemon_id = p.id WHERE LOWER(p.name) = LOWER(?);"""
-            cursor.execute(query, (pokemon_name.lower(),))
-                
-            abilities_list = [row['name'] for row in cursor.fetchall()]
-            if not abilities_list:
-                raise HTTPException(status_code=404, detail="No abilities found for this Pokemon")
-            return abilities_list
-        
+            with app.state.pool.get_conn() as conn:
+                cursor = conn.cursor()
+
+                # Get abilities of the Pokemon
+                query = """SELECT DISTINCT a.name FROM pokemon_abilities pa
+                JOIN abilities a ON a.id = pa.ability_id WHERE pa.pokemon_id = ?;"""
+                cursor.execute(query, (pokemon_id,))
+
+                abilities_list = [row['name'] for row in cursor]
+                if not abilities_list:
+                    raise HTTPException(status_code=404, detail="No abilities found for this Pokemon")
+                return abilities_list
+
         except sqlite3.Error as e:
             raise HTTPException(status_code=500, detail=f"Database error: {e}")
-        finally:
-            conn.close()
         # --- End Implementation ---
 
     # --- Implement Task 8 here ---
@@ -272,27 +545,135 @@ def create_fastapi_app() -> FastAPI:
         If it exists, returns its ID. If not, inserts the new name (Title Cased) and returns the new ID.
         """
         cursor = conn.cursor()
+        try:
+            cached_id = lookup_id(table, name.lower())
+        except KeyError:
+            cached_id = None
+        if cached_id is not None:
+            # Confirm the cached ID inside the write transaction: clean_database may have
+            # deleted or renamed the row since it was cached
+            cursor.execute(f"SELECT 1 FROM {table} WHERE id = ? AND name = ? COLLATE NOCASE;", (cached_id, name))
+            if cursor.fetchone():
+                return cached_id
+            lookup_id.cache_clear()
+
         # Check for existing record
-        cursor.execute(f"SELECT id FROM {table} WHERE LOWER(name) = LOWER(?);", (name,))
+        cursor.execute(f"SELECT id FROM {table} WHERE name = ? COLLATE NOCASE;", (name,))
         result = cursor.fetchone()
         if not result:
             # Insert new record if not found, ensuring Title Case
             cursor.execute(f"INSERT INTO {table} (name) VALUES (?);", (name.title(),))
-            conn.commit()
             # Return the last inserted ID
             return cursor.lastrowid
         return result["id"]
     
+    async def fetch_pokeapi(name: str) -> dict:
+        """
+        Fetches a Pokemon's name, types and abilities from PokeAPI, reusing a cached copy for names fetched recently.
+        Only the fields write_pokemon reads are kept; the full payload (moves, sprites, ...) is hundreds of KB.
+        HTTP errors are raised and never cached.
+        """
+        poke_data = app.state.pokeapi_cache.get(name)
+        if poke_data is None:
+            response = await app.state.http.get(f"https://pokeapi.co/api/v2/pokemon/{name}")
+            response.raise_for_status()
+            payload = response.json()
+            poke_data = {
+                "name": payload["name"],
+                "types": payload.get("types", []),
+                "abilities": payload.get("abilities", []),
+            }
+            app.state.pokeapi_cache.set(name, poke_data)
+        return poke_data
+    
+    def write_pokemon(conn: sqlite3.Connection, poke_data: dict) -> int:
+        """
+        Writes a PokeAPI Pokemon with its types, abilities and trainer links in one transaction.
+        Returns the last inserted row ID. Runs in a worker thread, so the write lock keeps
+        concurrent creates from sharing the writer connection's transaction.
+        """
+        with app.state.write_lock:
+            try:
+                cursor = conn.cursor()
+                # Write everything in one transaction, committed once at the end
+                conn.execute("BEGIN")
+            
+                # Get or create types
+                type1_id = None
+                type2_id = None
+                if poke_data.get("types"):
+                    type1_name = poke_data["types"][0]["type"]["name"]
+                    type1_id = get_or_create_id(conn, "types", type1_name)
+                
+                    if len(poke_data["types"]) > 1:
+                        type2_name = poke_data["types"][1]["type"]["name"]
+                        type2_id = get_or_create_id(conn, "types", type2_name)
+            
+                # Get or create Pokemon
+                pokemon_name_proper = poke_data["name"].title()
+                cursor.execute("SELECT id FROM pokemon WHERE name = ? COLLATE NOCASE", (pokemon_name_proper,))
+                pokemon_result = cursor.fetchone()
+            
+                if pokemon_result:
+                    pokemon_id = pokemon_result["id"]
+                
+                    # Update existing Pokemon's types
+                    cursor.execute(
+                        "UPDATE pokemon SET type1_id = ?, type2_id = ? WHERE id = ?",
+                        (type1_id, type2_id, pokemon_id)
+                    )
+                else:
+                    cursor.execute(
+                        "INSERT INTO pokemon (name, type1_id, type2_id) VALUES (?, ?, ?)",
+                        (pokemon_name_proper, type1_id, type2_id)
+                    )
+                    pokemon_id = cursor.lastrowid
+            
+                # Create trainer_pokemon_abilities records
+                trainer_pokemon_abilities_ids = []
+                abilities_data = poke_data.get("abilities", [])
+            
+                # Count trainers once so each ability can pick one by random offset instead of sorting the table
+                cursor.execute("SELECT COUNT(*) FROM trainers")
+                trainer_count = cursor.fetchone()[0]
+            
+                for ability_data in abilities_data:
+                    ability_name = ability_data["ability"]["name"].title()
+                    ability_id = get_or_create_id(conn, "abilities", ability_name)
+                
+                    # Create pokemon_abilities link if it doesn't exist
+                    cursor.execute(
+                        "INSERT OR IGNORE INTO pokemon_abilities (pokemon_id, ability_id) VALUES (?, ?)",
+                        (pokemon_id, ability_id)
+                    )
+                
+                    # Get random trainer from the table
+                    if not trainer_count:
+                        # Create default trainer if no trainers exist
+                        trainer_id = get_or_create_id(conn, "trainers", "Default Trainer")
+                    else:
+                        cursor.execute("SELECT id FROM trainers LIMIT 1 OFFSET ?", (random.randrange(trainer_count),))
+                        trainer_id = cursor.fetchone()["id"]
+                
+                    # Create trainer_pokemon_abilities record
+                    cursor.execute(
+                        "INSERT INTO trainer_pokemon_abilities (pokemon_id, trainer_id, ability_id) VALUES (?, ?, ?)",
+                        (pokemon_id, trainer_id, ability_id)
+                    )
+                    trainer_pokemon_abilities_ids.append(cursor.lastrowid)
+            
+                conn.execute("COMMIT")
+                return cursor.lastrowid
+            finally:
+                # Never leave the shared writer inside a half-finished transaction
+                if conn.in_transaction:
+                    conn.rollback()
+    
     @app.post("/pokemon/create/{pokemon_name}")
     async def create_pokemon(pokemon_name: str):
         # Fetch data from PokeAPI
-        pokeapi_url = f"https://pokeapi.co/api/v2/pokemon/{pokemon_name.lower()}"
-        
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(pokeapi_url)
-                response.raise_for_status()
-                poke_data = response.json()
+            poke_data = await fetch_pokeapi(pokemon_name.lower())
         except httpx.HTTPStatusError as e:
             if e.response.status_code == 404:
                 raise HTTPException(status_code=404, detail=f"Pokemon '{pokemon_name}' not found in PokeAPI")
@@ -300,87 +681,17 @@ def create_fastapi_app() -> FastAPI:
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch Pokemon data: {e}")
         
-        conn = connect_db()
-        if not conn:
-            raise HTTPException(status_code=500, detail="Database connection failed")
-        
         try:
-            cursor = conn.cursor()
-            
-            # Get or create types
-            type1_id = None
-            type2_id = None
-            if poke_data.get("types"):
-                type1_name = poke_data["types"][0]["type"]["name"]
-                type1_id = get_or_create_id(conn, "types", type1_name)
-                
-                if len(poke_data["types"]) > 1:
-                    type2_name = poke_data["types"][1]["type"]["name"]
-                    type2_id = get_or_create_id(conn, "types", type2_name)
-            
-            # Get or create Pokemon
-            pokemon_name_proper = poke_data["name"].title()
-            cursor.execute("SELECT id FROM pokemon WHERE LOWER(name) = LOWER(?)", (pokemon_name_proper,))
-            pokemon_result = cursor.fetchone()
-            
-            if pokemon_result:
-                pokemon_id = pokemon_result["id"]
-                
-                # Update existing Pokemon's types
-                cursor.execute(
-                    "UPDATE pokemon SET type1_id = ?, type2_id = ? WHERE id = ?",
-                    (type1_id, type2_id, pokemon_id)
-                )
-            else:
-                cursor.execute(
-                    "INSERT INTO pokemon (name, type1_id, type2_id) VALUES (?, ?, ?)",
-                    (pokemon_name_proper, type1_id, type2_id)
-                )
-                conn.commit()
-                pokemon_id = cursor.lastrowid
-            
-            # Create trainer_pokemon_abilities records
-            trainer_pokemon_abilities_ids = []
-            abilities_data = poke_data.get("abilities", [])
-            
-            for ability_data in abilities_data:
-                ability_name = ability_data["ability"]["name"].title()
-                ability_id = get_or_create_id(conn, "abilities", ability_name)
-                
-                # Create pokemon_abilities link if it doesn't exist
-                cursor.execute(
-                    "INSERT OR IGNORE INTO pokemon_abilities (pokemon_id, ability_id) VALUES (?, ?)",
-                    (pokemon_id, ability_id)
-                )
-                conn.commit()
-                
-                # Get random trainer from the table
-                cursor.execute("SELECT id FROM trainers ORDER BY RANDOM() LIMIT 1")
-                trainer_result = cursor.fetchone()
-                
-                if not trainer_result:
-                    # Create default trainer if no trainers exist
-                    trainer_id = get_or_create_id(conn, "trainers", "Default Trainer")
-                else:
-                    trainer_id = trainer_result["id"]
-                
-                # Create trainer_pokemon_abilities record
-                cursor.execute(
-                    "INSERT INTO trainer_pokemon_abilities (pokemon_id, trainer_id, ability_id) VALUES (?, ?, ?)",
-                    (pokemon_id, trainer_id, ability_id)
-                )
-                conn.commit()
-                trainer_pokemon_abilities_ids.append(cursor.lastrowid)
-            
+            # Keep the event loop free for other requests while SQLite writes
+            row_id = await asyncio.to_thread(write_pokemon, app.state.writer, poke_data)
             return {
-                "id": cursor.lastrowid,
+                "id": row_id,
             }
             
         except sqlite3.Error as e:
-            conn.rollback()
             raise HTTPException(status_code=500, detail=f"Database error: {e}")
         finally:
-            conn.close()
+            app.state.response_cache.clear()
         
     # --- End Implementation ---
 
@@ -45,6 +45,16 @@ def test_db(tmp_path_factory):
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT
         );
+        CREATE TABLE pokemon_abilities (
+            pokemon_id INTEGER,
+            ability_id INTEGER,
+            PRIMARY KEY (pokemon_id, ability_id)
+        );
+        CREATE TABLE trainer_pokemon (
+            trainer_id INTEGER,
+            pokemon_id INTEGER,
+            PRIMARY KEY (trainer_id, pokemon_id)
+        );
         CREATE TABLE trainer_pokemon_abilities (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             pokemon_id INTEGER,
@@ -59,6 +69,8 @@ def test_db(tmp_path_factory):
     conn.execute("INSERT INTO trainers (name) VALUES ('Ash ketchum'), ('Misty')")
     conn.execute("INSERT INTO pokemon (name, type1_id, type2_id) VALUES ('Charmander', 1, NULL), ('Squirtle', 2, NULL)")
     conn.execute("INSERT INTO trainer_pokemon_abilities (pokemon_id, trainer_id, ability_id) VALUES (1, 1, 1), (2, 2, 2)")
+    conn.execute("INSERT INTO pokemon_abilities (pokemon_id, ability_id) VALUES (1, 1), (2, 2)")
+    conn.execute("INSERT INTO trainer_pokemon (trainer_id, pokemon_id) VALUES (1, 1), (2, 2)")
     conn.commit()
     yield db_path
     conn.close()
@@ -71,7 +83,9 @@ def patch_db_name(monkeypatch, test_db):
 @pytest.fixture
 def client():
     app = create_fastapi_app()
-    return TestClient(app)
+    # Entering the client runs the app's lifespan, which opens the shared connection
+    with TestClient(app) as test_client:
+        yield test_client
 
 # --- Tests ---
 
@@ -79,6 +93,8 @@ def test_connect_db_success():
     conn = connect_db()
     assert conn is not None
     assert isinstance(conn, sqlite3.Connection)
+    # Transactions are managed explicitly with BEGIN/COMMIT
+    assert conn.isolation_level is None
     conn.close()
 
 def test_connect_db_failure(monkeypatch):
@@ -118,6 +134,69 @@ def test_clean_database_removes_duplicates_and_misspellings():
     assert "Ash ketchum" in trainer_names
     conn.close()
 
+def test_clean_database_trims_and_capitalizes_names():
+    conn = connect_db()
+    conn.executemany(
+        "INSERT INTO abilities (name) VALUES (?)",
+        [("  overgrow\t",), ("SWIFT SWIM",), ("???",), ("Poision\n",), ("\xa0mew\xa0",)],
+    )
+    conn.commit()
+
+    clean_database(conn)
+
+    ability_names = [row["name"] for row in conn.execute("SELECT name FROM abilities").fetchall()]
+    assert "Overgrow" in ability_names
+    assert "Swift swim" in ability_names
+    assert "Poison" in ability_names
+    assert "Mew" in ability_names
+    assert "???" not in ability_names
+    conn.close()
+
+def test_clean_database_capitalizes_non_ascii_names():
+    conn = connect_db()
+    conn.executemany("INSERT INTO trainers (name) VALUES (?)", [("élan",), ("ÉLAN",)])
+
+    clean_database(conn)
+
+    trainer_names = [row["name"] for row in conn.execute("SELECT name FROM trainers").fetchall()]
+    assert trainer_names.count("Élan") == 1
+    assert "élan" not in trainer_names
+    conn.close()
+
+def test_clean_database_inside_callers_transaction(test_db):
+    # A default connection opens an implicit transaction for the pending insert
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO types (name) VALUES ('Poision')")
+    assert conn.in_transaction
+
+    clean_database(conn)
+
+    # The caller's pending row is kept and cleaned rather than rolled back
+    type_names = [row[0] for row in conn.execute("SELECT name FROM types").fetchall()]
+    assert "Poison" in type_names
+    assert "Poision" not in type_names
+    # Committing is left to the caller
+    assert conn.in_transaction
+    conn.close()
+
+def test_clean_database_error_keeps_callers_transaction(tmp_path):
+    # No trainers table, so cleaning fails after pokemon, types and abilities are done
+    conn = sqlite3.connect(tmp_path / "no_trainers.db")
+    conn.executescript("""
+        CREATE TABLE pokemon (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+        CREATE TABLE types (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+        CREATE TABLE abilities (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT);
+    """)
+    conn.execute("INSERT INTO types (name) VALUES ('gras'), ('---')")
+
+    clean_database(conn)
+
+    # The partial clean-up is undone; the caller's pending rows and transaction remain
+    assert conn.in_transaction
+    type_names = [row[0] for row in conn.execute("SELECT name FROM types ORDER BY id").fetchall()]
+    assert type_names == ["gras", "---"]
+    conn.close()
+
 def test_root_endpoint(client):
     response = client.get("/")
     assert response.status_code == 200
@@ -146,18 +225,51 @@ def test_get_pokemon_by_type_success(client):
     assert response.status_code == 200
     assert "Charmander" in response.json()
 
+def test_get_pokemon_by_type_case_insensitive(client):
+    response = client.get("/pokemon/type/fIRE")
+    assert response.status_code == 200
+    assert response.json() == client.get("/pokemon/type/Fire").json()
+
+def test_get_pokemon_by_type_served_from_cache(client):
+    response = client.get("/pokemon/type/Fire")
+    cache = client.app.state.response_cache
+    assert cache.get(("get_pokemon_by_type", "fire")) == response.json()
+
+    # Not-found responses are never cached
+    client.get("/pokemon/type/UnknownType")
+    assert cache.get(("get_pokemon_by_type", "unknowntype")) is None
+
+def test_response_cache_drops_values_computed_before_clear(client):
+    cache = client.app.state.response_cache
+    generation = cache.generation
+    # A create clears the cache while a GET is still computing its result
+    cache.clear()
+    cache.set(("get_pokemon_by_type", "water"), ["Squirtle"], generation)
+    assert cache.get(("get_pokemon_by_type", "water")) is None
+
 def test_get_pokemon_by_type_not_found(client):
     response = client.get("/pokemon/type/UnknownType")
     assert response.status_code == 404
 
+def test_get_pokemon_by_type_without_pokemon(client):
+    response = client.get("/pokemon/type/Grass")
+    assert response.status_code == 404
+    assert response.json()["detail"] == "No Pokemon found with this type"
+
 def test_get_trainers_by_pokemon_success(client):
     response = client.get("/trainers/pokemon/Charmander")
     assert response.status_code == 200
     assert "Ash Ketchum" in response.json()
 
+def test_get_trainers_by_pokemon_case_insensitive(client):
+    response = client.get("/trainers/pokemon/sQUIRTLE")
+    assert response.status_code == 200
+    assert response.json() == ["Misty"]
+
 def test_get_trainers_by_pokemon_not_found(client):
     response = client.get("/trainers/pokemon/Unknownmon")
     assert response.status_code == 404
+    assert response.json()["detail"] == "Pokemon not found"
 
 def test_get_abilities_by_pokemon_success(client):
     response = client.get("/abilities/pokemon/Charmander")
@@ -167,3 +279,95 @@ def test_get_abilities_by_pokemon_success(client):
 def test_get_abilities_by_pokemon_not_found(client):
     response = client.get("/abilities/pokemon/Unknownmon")
     assert response.status_code == 404
+
+def test_failed_startup_closes_connections(monkeypatch):
+    import candidate_solution
+    opened = []
+
+    def tracking_connect_db():
+        conn = connect_db()
+        opened.append(conn)
+        return conn
+
+    def failing_refresh(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(candidate_solution, "connect_db", tracking_connect_db)
+    monkeypatch.setattr(candidate_solution, "refresh_pokemon_trainer_flat", failing_refresh)
+    with pytest.raises(sqlite3.OperationalError):
+        with TestClient(create_fastapi_app()):
+            pass
+
+    assert opened
+    for conn in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+def test_endpoints_reuse_pooled_connections(client):
+    pool = client.app.state.pool
+    client.get("/pokemon/ability/Blaze")
+    client.get("/pokemon/type/Fire")
+    # Every borrowed connection is handed back once the request finishes
+    assert pool._connections.full()
+
+def test_pooled_connections_are_read_only(client):
+    with client.app.state.pool.get_conn() as conn:
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("INSERT INTO types (name) VALUES ('Ghost')")
+
+def _mock_pokeapi_get(poke_data):
+    response = MagicMock()
+    response.json.return_value = poke_data
+    response.raise_for_status.return_value = None
+    return AsyncMock(return_value=response)
+
+def test_create_pokemon(client):
+    poke_data = {
+        "name": "gastly",
+        "types": [{"type": {"name": "ghost"}}, {"type": {"name": "poison"}}],
+        "abilities": [{"ability": {"name": "levitate"}}],
+        "moves": [{"move": {"name": "lick"}}],
+    }
+    # Populate the response cache so we can check that creating clears it
+    client.get("/pokemon/type/Fire")
+
+    pokeapi_get = _mock_pokeapi_get(poke_data)
+    with patch.object(client.app.state.http, "get", pokeapi_get):
+        response = client.post("/pokemon/create/Gastly")
+        # A repeat create reuses the cached PokeAPI response
+        client.post("/pokemon/create/gastly")
+    pokeapi_get.assert_awaited_once()
+    # Only the fields used to write the Pokemon are cached
+    assert set(client.app.state.pokeapi_cache.get("gastly")) == {"name", "types", "abilities"}
+
+    assert response.status_code == 200
+    assert "id" in response.json()
+    assert client.app.state.response_cache.get(("get_pokemon_by_type", "fire")) is None
+    assert not client.app.state.writer.in_transaction
+    assert client.get("/pokemon/type/Ghost").json() == ["Gastly"]
+    assert client.get("/abilities/pokemon/gastly").json() == ["Levitate"]
+
+def test_create_pokemon_ignores_cached_id_of_deleted_row(client, test_db):
+    conn = sqlite3.connect(test_db)
+    conn.execute("INSERT INTO types (name) VALUES ('Dragon')")
+    conn.commit()
+    # Caches the Dragon type ID
+    client.get("/pokemon/type/dragon")
+    # Another process, e.g. clean_database, deletes the row while the app is up
+    conn.execute("DELETE FROM types WHERE name = 'Dragon'")
+    conn.commit()
+
+    poke_data = {
+        "name": "dratini",
+        "types": [{"type": {"name": "dragon"}}],
+        "abilities": [{"ability": {"name": "shed-skin"}}],
+    }
+    with patch.object(client.app.state.http, "get", _mock_pokeapi_get(poke_data)):
+        response = client.post("/pokemon/create/dratini")
+
+    assert response.status_code == 200
+    type_name = conn.execute(
+        "SELECT types.name FROM pokemon JOIN types ON types.id = pokemon.type1_id WHERE pokemon.name = 'Dratini'"
+    ).fetchone()
+    assert type_name == ("Dragon",)
+    conn.close()